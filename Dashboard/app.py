@@ -6,80 +6,163 @@
 
 import numpy as np
 import pandas as pd
-import matplotlib.pyplot as plt
+import pyarrow as pa
+import pyarrow.csv as pacsv
+import altair as alt
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 import streamlit as st  # Importing streamlit for dashboard
+from numba import njit
+
+NSE_HEADERS = {
+    'User-Agent': 'Mozilla/5.0',
+    'Accept-Language': 'en-US,en;q=0.9',
+    'Referer': 'https://www.nseindia.com/',
+    'X-Requested-With': 'XMLHttpRequest',
+}
+
+# NSE expiry dates look like 28-Nov-2024
+EXPIRY_FORMAT = '%d-%b-%Y'
+
+# Below this many rows a plain boolean mask beats numexpr's dispatch overhead
+NUMEXPR_MIN_ROWS = 10_000
+
+# Shared HTTP session so reruns reuse pooled keep-alive connections and cookies.
+# It is one process-wide object, so the dashboard assumes a single user at a time:
+# concurrent sessions would share (and re-prime) the same cookie jar.
+@st.cache_resource
+def get_nse_session():
+    session = requests.Session()
+    retries = Retry(total=2, backoff_factor=0.3)
+    session.mount('https://', HTTPAdapter(pool_connections=4, pool_maxsize=8, max_retries=retries))
+    try:
+        session.get('https://www.nseindia.com/', headers=NSE_HEADERS, timeout=5)  # Collect NSE cookies
+    except requests.RequestException:
+        pass  # The option-chain request reports the failure
+    return session
+
+# Lock held while re-priming, so concurrent reruns do not clear the session at the same time
+@st.cache_resource
+def get_nse_session_lock():
+    return threading.Lock()
+
+# Return the option-chain payload, or None when NSE rejects the session's cookies
+def request_option_chain(url):
+    response = get_nse_session().get(url, headers=NSE_HEADERS, timeout=5)
+    if response.status_code in (401, 403):
+        return None
+    response.raise_for_status()
+    data = response.json()
+    if 'records' not in data or 'data' not in data['records']:
+        return None  # NSE also answers missing or expired cookies with a 200 and an empty body
+    return data
 
 # Function to fetch options data
+@st.cache_data(ttl=60, show_spinner=False)
 def fetch_options_data(stock_symbol):
-    session = requests.Session()
     url = f'https://www.nseindia.com/api/option-chain-indices?symbol={stock_symbol}'
-    
-    headers = {
-        'User-Agent': 'Mozilla/5.0',
-        'Accept-Language': 'en-US,en;q=0.9',
-        'Referer': 'https://www.nseindia.com/',
-        'X-Requested-With': 'XMLHttpRequest',
-    }
-
-    response = session.get(url, headers=headers)
-    if response.status_code == 200:
-        data = response.json()
-        if 'records' in data and 'data' in data['records']:
-            calls_data, puts_data = [], []
-            for option in data['records']['data']:
-                strike_price = option['strikePrice']
-                expiry_date = option['expiryDate']
-                if 'CE' in option:
-                    calls_data.append({'strikePrice': strike_price, 'expiryDate': expiry_date, **option['CE']})
-                if 'PE' in option:
-                    puts_data.append({'strikePrice': strike_price, 'expiryDate': expiry_date, **option['PE']})
-            calls_df = pd.DataFrame(calls_data) if calls_data else pd.DataFrame()
-            puts_df = pd.DataFrame(puts_data) if puts_data else pd.DataFrame()
-            return calls_df, puts_df
-    return None, None
-
-# Load baseline skew from CSV if it exists
+    data = request_option_chain(url)
+    if data is None:
+        # NSE cookies are missing or expired; collect fresh ones and retry once
+        with get_nse_session_lock():
+            get_nse_session.clear()
+            data = request_option_chain(url)
+    # Raise rather than return on failure, so a failed fetch is not cached
+    if data is None:
+        raise requests.exceptions.InvalidJSONError(f'No option-chain records for {stock_symbol}')
+    records = data['records']['data']
+    calls_df = extract_option_side(records, 'CE')
+    puts_df = extract_option_side(records, 'PE')
+    return calls_df, puts_df
+
+# Collect one side of the option chain (CE for calls, PE for puts) straight into column arrays
+def extract_option_side(records, side):
+    n = len(records)
+    strike_price = np.empty(n, np.int32)
+    expiry_date = np.empty(n, object)
+    implied_volatility = np.empty(n, np.float32)
+
+    count = 0
+    for option in records:
+        side_data = option.get(side)
+        if side_data:
+            strike_price[count] = option['strikePrice']
+            expiry_date[count] = option['expiryDate']
+            implied_volatility[count] = side_data.get('impliedVolatility', 0)
+            count += 1
+
+    return pd.DataFrame({
+        'strikePrice': strike_price[:count],
+        'expiryDate': pd.to_datetime(expiry_date[:count], format=EXPIRY_FORMAT, cache=True),
+        'impliedVolatility': implied_volatility[:count],
+    })
+
+# Read a baseline file; the mtime argument makes a rewritten file miss the cache
+@st.cache_data(max_entries=2, show_spinner=False)
+def read_baseline_file(filename, mtime):
+    return pd.read_feather(filename)
+
+# Load baseline skew from Feather if it exists
 def load_baseline_skew(filename):
     if os.path.exists(filename):
-        return pd.read_csv(filename)
+        return read_baseline_file(filename, os.path.getmtime(filename))
     return None
 
-# Save baseline skew to CSV
-def save_baseline_skew(baseline_skew, filename):
-    baseline_skew.to_csv(filename, index=False)
+# Save baseline skew to Feather, leaving an unchanged file (and its cached read) alone
+def save_baseline_skew(baseline_skew, filename, previous_skew=None):
+    baseline_skew = baseline_skew.reset_index(drop=True)
+    if previous_skew is None or not previous_skew.equals(baseline_skew):
+        baseline_skew.to_feather(filename)
+
+# Drop rows with a zero implied volatility
+def filter_positive_iv(options_df):
+    if len(options_df) >= NUMEXPR_MIN_ROWS:
+        return options_df.query('impliedVolatility > 0', engine='numexpr')
+    return options_df.iloc[options_df['impliedVolatility'].to_numpy() > 0]
 
 # Calculate implied volatility skew, filtering out zero IVs
 def calculate_volatility_skew(options_df):
-    return options_df[options_df['impliedVolatility'] > 0][['strikePrice', 'expiryDate', 'impliedVolatility']]
+    return filter_positive_iv(options_df[['strikePrice', 'expiryDate', 'impliedVolatility']])
 
 # Plot volatility skew using Streamlit's plotting features
 def plot_volatility_skew(df, option_type):
     st.subheader(f'Volatility Skew for {option_type}')
-    fig, ax = plt.subplots(figsize=(10, 6))
-    sorted_expiry_dates = sorted(df['expiryDate'].unique(), key=pd.to_datetime)
-    for expiry in sorted_expiry_dates:
-        subset = df[df['expiryDate'] == expiry]
-        ax.plot(subset['strikePrice'], subset['impliedVolatility'], label=f'Expiry: {expiry}')
-    ax.set_xlabel('Strike Price')
-    ax.set_ylabel('Implied Volatility')
-    ax.legend()
-    ax.grid()
-    st.pyplot(fig)
+    # Expiry dates are datetimes, so one sort orders the legend chronologically
+    chart_df = df.sort_values(['expiryDate', 'strikePrice'])[['strikePrice', 'impliedVolatility']].assign(
+        expiry=df['expiryDate'].dt.strftime(EXPIRY_FORMAT))
+
+    # Vega renders the chart in the browser, so reruns ship JSON instead of a rasterized figure
+    chart = alt.Chart(chart_df).mark_line().encode(
+        x=alt.X('strikePrice:Q', title='Strike Price', scale=alt.Scale(zero=False)),
+        y=alt.Y('impliedVolatility:Q', title='Implied Volatility', scale=alt.Scale(zero=False)),
+        color=alt.Color('expiry:N', title='Expiry', sort=chart_df['expiry'].unique().tolist()),
+    )
+    st.altair_chart(chart)
+
+# Flag rows whose implied volatility moved by more than the threshold
+@njit(cache=True, fastmath=True)
+def iv_change_mask(current_iv, baseline_iv, threshold):
+    mask = np.empty(current_iv.size, np.bool_)
+    for i in range(current_iv.size):
+        mask[i] = abs(current_iv[i] - baseline_iv[i]) > threshold
+    return mask
 
 # Compare current and baseline skews
 def compare_skews(baseline_skew, current_skew, threshold):
-    significant_changes = []
-    baseline_dict = {(row['strikePrice'], row['expiryDate']): row['impliedVolatility'] for _, row in baseline_skew.iterrows()}
-    current_dict = {(row['strikePrice'], row['expiryDate']): row['impliedVolatility'] for _, row in current_skew.iterrows()}
-    
-    for key, current_iv in current_dict.items():
-        baseline_iv = baseline_dict.get(key)
-        if baseline_iv is not None and abs(current_iv - baseline_iv) > threshold:
-            significant_changes.append((key[0], key[1], current_iv, baseline_iv))
-    return significant_changes
+    merged_skew = current_skew.merge(baseline_skew, on=['strikePrice', 'expiryDate'], suffixes=('_current', '_baseline'))
+    mask = iv_change_mask(merged_skew['impliedVolatility_current'].to_numpy(dtype=np.float64),
+                          merged_skew['impliedVolatility_baseline'].to_numpy(dtype=np.float64), threshold)
+    significant = merged_skew[mask]
+
+    # Widen the float32 IVs back to NSE's two decimals so float32 noise stays out of the output
+    return list(zip(significant['strikePrice'], significant['expiryDate'].dt.strftime(EXPIRY_FORMAT),
+                    significant['impliedVolatility_current'].astype('float64').round(2),
+                    significant['impliedVolatility_baseline'].astype('float64').round(2)))
 
 # Display significant changes
 def display_significant_changes(changes, option_type):
@@ -95,7 +178,7 @@ def save_significant_changes_to_file(significant_changes, option_type):
     date_str = datetime.now().strftime('%Y-%m-%d')
     filename = f'significant_changes_{option_type}_{date_str}.csv'
     changes_df = pd.DataFrame(significant_changes, columns=['Strike', 'Expiry', 'Current IV', 'Baseline IV'])
-    changes_df.to_csv(filename, index=False)
+    pacsv.write_csv(pa.Table.from_pandas(changes_df, preserve_index=False), filename)
     st.write(f"Significant changes saved to {filename}")
 
 # Streamlit dashboard logic
@@ -105,8 +188,8 @@ def main():
     # Sidebar for stock symbol and threshold input
     stock_symbol = st.sidebar.text_input("Stock Symbol", value="NIFTY")
     threshold = st.sidebar.slider("Significant Change Threshold (in %)", 1, 10, 5) / 100
-    baseline_calls_filename = "baseline_calls_skew.csv"
-    baseline_puts_filename = "baseline_puts_skew.csv"
+    baseline_calls_filename = "baseline_calls_skew.feather"
+    baseline_puts_filename = "baseline_puts_skew.feather"
 
     # Load baseline skews
     baseline_calls = load_baseline_skew(baseline_calls_filename)
@@ -118,11 +201,17 @@ def main():
     # Tab for fetching and plotting volatility skew
     with tab1:
         st.write(f"Fetching options data for {stock_symbol}...")
-        calls, puts = fetch_options_data(stock_symbol)
+        try:
+            calls, puts = fetch_options_data(stock_symbol)
+        except requests.RequestException:
+            calls, puts = None, None
 
         if calls is not None and puts is not None:
-            calls_data = calculate_volatility_skew(calls)
-            puts_data = calculate_volatility_skew(puts)
+            # Calculate volatility skew, calls and puts concurrently
+            with ThreadPoolExecutor(max_workers=2) as executor:
+                calls_future = executor.submit(calculate_volatility_skew, calls)
+                puts_future = executor.submit(calculate_volatility_skew, puts)
+                calls_data, puts_data = calls_future.result(), puts_future.result()
 
             # Plot skews
             plot_volatility_skew(calls_data, 'Calls')
@@ -141,8 +230,9 @@ def main():
                     save_significant_changes_to_file(significant_put_changes, 'Puts')
 
             # Save the current skews as the new baseline
-            save_baseline_skew(calls_data, baseline_calls_filename)
-            save_baseline_skew(puts_data, baseline_puts_filename)
+            with ThreadPoolExecutor(max_workers=2) as executor:
+                list(executor.map(save_baseline_skew, [calls_data, puts_data],
+                                  [baseline_calls_filename, baseline_puts_filename], [baseline_calls, baseline_puts]))
         else:
             st.write("No data available for the given stock symbol.")
 
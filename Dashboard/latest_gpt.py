@@ -118,7 +118,8 @@ def compare_skews(baseline_skew, current_skew, threshold):
 def plot_volatility_skew(df, option_type):
     st.subheader(f'Volatility Skew for {option_type}')
     fig, ax = plt.subplots(figsize=(10, 6))
-    sorted_expiry_dates = sorted(df['expiryDate'].unique(), key=pd.to_datetime)
+    expiry_dates = pd.Series(df['expiryDate'].unique())
+    sorted_expiry_dates = expiry_dates.iloc[pd.to_datetime(expiry_dates, format='%d-%b-%Y', cache=True).argsort()]
     for expiry in sorted_expiry_dates:
         subset = df[df['expiryDate'] == expiry]
         ax.plot(subset['strikePrice'], subset['impliedVolatility'], label=f'Expiry: {expiry}')
@@ -123,7 +123,8 @@ def compare_skews(current_skew_df, baseline_skew_df, atm_iv_threshold=0.05, skew
 def plot_volatility_skew(df, option_type):
     st.subheader(f'Volatility Skew for {option_type}')
     fig, ax = plt.subplots(figsize=(10, 6))
-    sorted_expiry_dates = sorted(df['expiryDate'].unique(), key=pd.to_datetime)
+    expiry_dates = pd.Series(df['expiryDate'].unique())
+    sorted_expiry_dates = expiry_dates.iloc[pd.to_datetime(expiry_dates, format='%d-%b-%Y', cache=True).argsort()]
     for expiry in sorted_expiry_dates:
         subset = df[df['expiryDate'] == expiry]
         ax.plot(subset['strikePrice'], subset['impliedVolatility'], label=f'Expiry: {expiry}')
@@ -139,12 +140,8 @@ def display_significant_changes(changes, option_type):
         st.write(f"No significant changes for {option_type}.")
     else:
         # Iterate through each row of changes DataFrame
-        for index, row in changes.iterrows():
-            strike_price = row['strikePrice']
-            expiry_date = row['expiryDate']
-            atm_change = row['ATM_IV_change']
-            skew_change = row['skew_change']
-
+        rows = changes[['strikePrice', 'expiryDate', 'ATM_IV_change', 'skew_change']].itertuples(index=False, name=None)
+        for strike_price, expiry_date, atm_change, skew_change in rows:
             st.write(f"**{option_type} - Strike Price: {strike_price}, Expiry: {expiry_date}**")
             st.write(f"- ATM IV Change: {atm_change:.2f}%")
             st.write(f"- Skew Change: {skew_change:.2f}%")
@@ -6,92 +6,167 @@
 
 import numpy as np
 import pandas as pd
-import matplotlib.pyplot as plt
+import pyarrow as pa
+import pyarrow.csv as pacsv
+from pandas.api.types import union_categoricals
+import altair as alt
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 import streamlit as st
 
+NSE_HEADERS = {
+    'User-Agent': 'Mozilla/5.0',
+    'Accept-Language': 'en-US,en;q=0.9',
+    'Referer': 'https://www.nseindia.com/',
+    'X-Requested-With': 'XMLHttpRequest',
+}
+
+# NSE expiry dates look like 28-Nov-2024
+EXPIRY_FORMAT = '%d-%b-%Y'
+
+# Below this many rows a plain boolean mask beats numexpr's dispatch overhead
+NUMEXPR_MIN_ROWS = 10_000
+
+MONEYNESS_CATEGORIES = ['ITM', 'ATM', 'OTM']
+
+# Shared HTTP session so reruns reuse pooled keep-alive connections and cookies.
+# It is one process-wide object, so the dashboard assumes a single user at a time:
+# concurrent sessions would share (and re-prime) the same cookie jar.
+@st.cache_resource
+def get_nse_session():
+    session = requests.Session()
+    retries = Retry(total=2, backoff_factor=0.3)
+    session.mount('https://', HTTPAdapter(pool_connections=4, pool_maxsize=8, max_retries=retries))
+    try:
+        session.get('https://www.nseindia.com/', headers=NSE_HEADERS, timeout=5)  # Collect NSE cookies
+    except requests.RequestException:
+        pass  # The option-chain request reports the failure
+    return session
+
+# Lock held while re-priming, so concurrent reruns do not clear the session at the same time
+@st.cache_resource
+def get_nse_session_lock():
+    return threading.Lock()
+
+# Return the option-chain payload, or None when NSE rejects the session's cookies
+def request_option_chain(url):
+    response = get_nse_session().get(url, headers=NSE_HEADERS, timeout=5)
+    if response.status_code in (401, 403):
+        return None
+    response.raise_for_status()
+    data = response.json()
+    if 'records' not in data or 'data' not in data['records']:
+        return None  # NSE also answers missing or expired cookies with a 200 and an empty body
+    return data
+
 # Function to fetch options data
+@st.cache_data(ttl=60, show_spinner=False)
 def fetch_options_data(stock_symbol):
-    session = requests.Session()
     url = f'https://www.nseindia.com/api/option-chain-indices?symbol={stock_symbol}'
-
-    headers = {
-        'User-Agent': 'Mozilla/5.0',
-        'Accept-Language': 'en-US,en;q=0.9',
-        'Referer': 'https://www.nseindia.com/',
-        'X-Requested-With': 'XMLHttpRequest',
-    }
-
-    response = session.get(url, headers=headers)
-    if response.status_code == 200:
-        data = response.json()
-        if 'records' in data and 'data' in data['records']:
-            calls_data, puts_data = [], []
-            for option in data['records']['data']:
-                strike_price = option['strikePrice']
-                expiry_date = option['expiryDate']
-                if 'CE' in option:
-                    calls_data.append({'strikePrice': strike_price, 'expiryDate': expiry_date, **option['CE']})
-                if 'PE' in option:
-                    puts_data.append({'strikePrice': strike_price, 'expiryDate': expiry_date, **option['PE']})
-            calls_df = pd.DataFrame(calls_data) if calls_data else pd.DataFrame()
-            puts_df = pd.DataFrame(puts_data) if puts_data else pd.DataFrame()
-            return calls_df, puts_df
-    return None, None
+    data = request_option_chain(url)
+    if data is None:
+        # NSE cookies are missing or expired; collect fresh ones and retry once
+        with get_nse_session_lock():
+            get_nse_session.clear()
+            data = request_option_chain(url)
+    # Raise rather than return on failure, so a failed fetch is not cached
+    if data is None:
+        raise requests.exceptions.InvalidJSONError(f'No option-chain records for {stock_symbol}')
+    records = data['records']['data']
+    calls_df = extract_option_side(records, 'CE')
+    puts_df = extract_option_side(records, 'PE')
+    return calls_df, puts_df
+
+# Collect one side of the option chain (CE for calls, PE for puts) straight into column arrays
+def extract_option_side(records, side):
+    n = len(records)
+    strike_price = np.empty(n, np.int32)
+    expiry_date = np.empty(n, object)
+    implied_volatility = np.empty(n, np.float32)
+
+    count = 0
+    for option in records:
+        side_data = option.get(side)
+        if side_data:
+            strike_price[count] = option['strikePrice']
+            expiry_date[count] = option['expiryDate']
+            implied_volatility[count] = side_data.get('impliedVolatility', 0)
+            count += 1
+
+    return pd.DataFrame({
+        'strikePrice': strike_price[:count],
+        'expiryDate': pd.to_datetime(expiry_date[:count], format=EXPIRY_FORMAT, cache=True),
+        'impliedVolatility': implied_volatility[:count],
+    })
+
+# Drop rows with a zero implied volatility
+def filter_positive_iv(options_df):
+    if len(options_df) >= NUMEXPR_MIN_ROWS:
+        return options_df.query('impliedVolatility > 0', engine='numexpr')
+    return options_df.iloc[options_df['impliedVolatility'].to_numpy() > 0]
 
 # Classify options based on spot price
 def classify_options(options_df, spot_price):
-    options_df = options_df[options_df['impliedVolatility'] > 0]  # Filter out zero IVs
-    options_df['moneyness'] = 'OTM'
-    options_df.loc[options_df['strikePrice'] == spot_price, 'moneyness'] = 'ATM'
+    options_df = filter_positive_iv(options_df)  # Filter out zero IVs
 
-    # For calls
-    options_df.loc[options_df['strikePrice'] < spot_price, 'moneyness'] = 'ITM'  # Calls ITM
-    options_df.loc[options_df['strikePrice'] > spot_price, 'moneyness'] = 'OTM'  # Calls OTM
-
-    return options_df
+    # For calls: below spot is ITM, at spot is ATM, above spot is OTM
+    strikes = options_df['strikePrice'].to_numpy()
+    moneyness = np.select([strikes < spot_price, strikes == spot_price], ['ITM', 'ATM'], default='OTM')
+    return options_df.assign(moneyness=pd.Categorical(moneyness, categories=MONEYNESS_CATEGORIES))
 
 # Calculate implied volatility skew
 def calculate_volatility_skew(options_df):
-    filtered_df = options_df[options_df['impliedVolatility'] > 0]
+    filtered_df = filter_positive_iv(options_df)
     if filtered_df.empty:
         return None, None
 
-    # Group by expiry date
-    grouped_df = filtered_df.groupby('expiryDate')
-    skew_data = []
+    # Calculate the ATM implied volatility per expiry and broadcast it onto every strike
+    atm_iv = filtered_df.loc[filtered_df['moneyness'] == 'ATM'].groupby('expiryDate')['impliedVolatility'].mean()
+    skew_df = filtered_df[['strikePrice', 'moneyness', 'expiryDate', 'impliedVolatility']].assign(
+        ATM_IV=filtered_df['expiryDate'].map(atm_iv))
 
-    for expiry, group in grouped_df:
-        # Calculate the ATM implied volatility for the current expiry group
-        atm_iv = group.loc[group['moneyness'] == 'ATM', 'impliedVolatility'].mean()
+    # Only expiries with an ATM IV get a skew
+    skew_df = skew_df.dropna(subset=['ATM_IV'])
+    skew_df = skew_df.assign(skew=skew_df['impliedVolatility'] - skew_df['ATM_IV'],
+                             strikePrice=skew_df['strikePrice'].astype('int32'),
+                             expiryDate=skew_df['expiryDate'].astype('category'))
 
-        # If ATM IV is available, calculate skew
-        if pd.notna(atm_iv):
-            group = group.copy()  # Avoid SettingWithCopyWarning
-            group['skew'] = group['impliedVolatility'] - atm_iv
-            group['ATM_IV'] = atm_iv  # Add ATM IV to the group
-            skew_data.append(group[['strikePrice', 'moneyness', 'expiryDate', 'impliedVolatility', 'skew', 'ATM_IV']])
+    return skew_df[['strikePrice', 'moneyness', 'expiryDate', 'impliedVolatility', 'skew', 'ATM_IV']], atm_iv
 
-    return pd.concat(skew_data), atm_iv
+# Read a baseline file; the mtime argument makes a rewritten file miss the cache
+@st.cache_data(max_entries=2, show_spinner=False)
+def read_baseline_file(filename, mtime):
+    return pd.read_feather(filename)
 
-# Load baseline skew from CSV if it exists
+# Load baseline skew from Feather if it exists
 def load_baseline_skew(filename):
     if os.path.exists(filename):
-        return pd.read_csv(filename)
+        return read_baseline_file(filename, os.path.getmtime(filename))
     return None
 
-# Save baseline skew to CSV
-def save_baseline_skew(baseline_skew, filename):
+# Save baseline skew to Feather, leaving an unchanged file (and its cached read) alone
+def save_baseline_skew(baseline_skew, filename, previous_skew=None):
     if baseline_skew is not None:
-        baseline_skew.to_csv(filename, index=False)
+        baseline_skew = baseline_skew.reset_index(drop=True)
+        if previous_skew is None or not previous_skew.equals(baseline_skew):
+            baseline_skew.to_feather(filename)
 
 # Compare current and baseline skews
 def compare_skews(baseline_skew, current_skew, threshold):
     if baseline_skew is None or current_skew is None:
         return None
 
+    # Share one set of expiry categories so the merge joins on category codes
+    expiry_dtype = pd.CategoricalDtype(union_categoricals([current_skew['expiryDate'].astype('category'),
+                                                           baseline_skew['expiryDate'].astype('category')]).categories)
+    current_skew = current_skew.astype({'strikePrice': 'int32', 'expiryDate': expiry_dtype})
+    baseline_skew = baseline_skew.astype({'strikePrice': 'int32', 'expiryDate': expiry_dtype})
+
     # Merge current and baseline skews on strikePrice and expiryDate
     merged_skew = current_skew.merge(baseline_skew, on=['strikePrice', 'expiryDate'], suffixes=('_current', '_baseline'))
 
@@ -109,33 +184,32 @@ def compare_skews(baseline_skew, current_skew, threshold):
     ]
 
     if not significant_changes.empty:
-        return significant_changes[['strikePrice', 'expiryDate', 'ATM_IV_change', 'skew_change']]
+        # Widen the float32 changes back to NSE's two decimals so float32 noise stays out of the output
+        changes = significant_changes[['strikePrice', 'expiryDate', 'ATM_IV_change', 'skew_change']]
+        return changes.astype({'ATM_IV_change': 'float64', 'skew_change': 'float64'}).round(2)
     
     return None
 
 # Plot volatility skew using Streamlit's plotting features
 def plot_volatility_skew(df, option_type):
     st.subheader(f'Volatility Skew for {option_type}')
-    fig, ax = plt.subplots(figsize=(10, 6))
 
-    # Get unique expiry dates and sort them
-    sorted_expiry_dates = sorted(df['expiryDate'].unique(), key=pd.to_datetime)
-    
     # Check if the dataframe is empty
     if df.empty:
         st.write(f"No data available for {option_type}.")
         return
     
-    for expiry in sorted_expiry_dates:
-        subset = df[df['expiryDate'] == expiry]
-        if not subset.empty:  # Only plot if there are entries
-            ax.plot(subset['strikePrice'], subset['impliedVolatility'], label=f'Expiry: {expiry}')
+    # Expiry dates are datetimes, so one sort orders the legend chronologically
+    chart_df = df.sort_values(['expiryDate', 'strikePrice'])[['strikePrice', 'impliedVolatility']].assign(
+        expiry=df['expiryDate'].dt.strftime(EXPIRY_FORMAT))
     
-    ax.set_xlabel('Strike Price')
-    ax.set_ylabel('Implied Volatility')
-    ax.legend()
-    ax.grid()
-    st.pyplot(fig)
+    # Vega renders the chart in the browser, so reruns ship JSON instead of a rasterized figure
+    chart = alt.Chart(chart_df).mark_line().encode(
+        x=alt.X('strikePrice:Q', title='Strike Price', scale=alt.Scale(zero=False)),
+        y=alt.Y('impliedVolatility:Q', title='Implied Volatility', scale=alt.Scale(zero=False)),
+        color=alt.Color('expiry:N', title='Expiry', sort=chart_df['expiry'].unique().tolist()),
+    )
+    st.altair_chart(chart)
 
 # Display significant changes
 def display_significant_changes(changes, option_type):
@@ -143,17 +217,18 @@ def display_significant_changes(changes, option_type):
         st.write(f"No significant changes for {option_type}.")
     else:
         st.write(f"Significant change in {option_type} ATM IV and Skew:")
-        for _, row in changes.iterrows():
-            st.write(f"- Strike Price: {row['strikePrice']}, Expiry Date: {row['expiryDate']}")
-            st.write(f"  - ATM IV Change: {row['ATM_IV_change']:.2f}%")
-            st.write(f"  - Skew Change: {row['skew_change']:.2f}%")
+        rows = changes[['strikePrice', 'expiryDate', 'ATM_IV_change', 'skew_change']].itertuples(index=False, name=None)
+        for strike_price, expiry_date, atm_change, skew_change in rows:
+            st.write(f"- Strike Price: {strike_price}, Expiry Date: {expiry_date:{EXPIRY_FORMAT}}")
+            st.write(f"  - ATM IV Change: {atm_change:.2f}%")
+            st.write(f"  - Skew Change: {skew_change:.2f}%")
 
 # Save significant changes to a CSV file
 def save_significant_changes_to_file(significant_changes, option_type):
     date_str = datetime.now().strftime('%Y-%m-%d')
     filename = f'significant_changes_{option_type}_{date_str}.csv'
-    changes_df = significant_changes.copy()  # Ensure it's a DataFrame
-    changes_df.to_csv(filename, index=False)
+    changes_df = significant_changes.assign(expiryDate=significant_changes['expiryDate'].dt.strftime(EXPIRY_FORMAT))
+    pacsv.write_csv(pa.Table.from_pandas(changes_df, preserve_index=False), filename)
     st.write(f"Significant changes saved to {filename}")
 
 # Streamlit dashboard logic
@@ -166,8 +241,8 @@ def main():
     spot_price = 24800  # Static spot price
 
     # Load baseline skews
-    baseline_calls_filename = "baseline_calls_skew.csv"
-    baseline_puts_filename = "baseline_puts_skew.csv"
+    baseline_calls_filename = "baseline_calls_skew.feather"
+    baseline_puts_filename = "baseline_puts_skew.feather"
     baseline_calls = load_baseline_skew(baseline_calls_filename)
     baseline_puts = load_baseline_skew(baseline_puts_filename)
 
@@ -181,16 +256,22 @@ def main():
     # Tab for fetching and plotting volatility skew
     with tab1:
         st.write(f"Fetching options data for {stock_symbol}...")
-        calls, puts = fetch_options_data(stock_symbol)
+        try:
+            calls, puts = fetch_options_data(stock_symbol)
+        except requests.RequestException:
+            calls, puts = None, None
 
         if calls is not None and puts is not None:
             # Classify options based on spot price
             calls = classify_options(calls, spot_price)
             puts = classify_options(puts, spot_price)
 
-            # Calculate volatility skew
-            calls_data, calls_atm_iv = calculate_volatility_skew(calls)
-            puts_data, puts_atm_iv = calculate_volatility_skew(puts)
+            # Calculate volatility skew, calls and puts concurrently
+            with ThreadPoolExecutor(max_workers=2) as executor:
+                calls_future = executor.submit(calculate_volatility_skew, calls)
+                puts_future = executor.submit(calculate_volatility_skew, puts)
+                calls_data, calls_atm_iv = calls_future.result()
+                puts_data, puts_atm_iv = puts_future.result()
 
             # Plot skews
             plot_volatility_skew(calls_data, 'Calls')
@@ -208,8 +289,9 @@ def main():
                 save_significant_changes_to_file(significant_put_changes, 'Puts')
 
             # Save the current skews as the new baseline
-            save_baseline_skew(calls_data, baseline_calls_filename)
-            save_baseline_skew(puts_data, baseline_puts_filename)
+            with ThreadPoolExecutor(max_workers=2) as executor:
+                list(executor.map(save_baseline_skew, [calls_data, puts_data],
+                                  [baseline_calls_filename, baseline_puts_filename], [baseline_calls, baseline_puts]))
 
         else:
             st.write("Failed to fetch options data.")